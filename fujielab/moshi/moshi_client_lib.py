@@ -57,6 +57,8 @@ MOSHI_CHANNELS = 1  # Mono
 MOSHI_CHUNK_SIZE = 1920  # 80ms at 24kHz - Moshi's standard frame size
 MOSHI_OPUS_FRAME_SIZE = 1920  # 80ms frames for Opus encoding
 MOSHI_CHUNK_DURATION_SEC = MOSHI_CHUNK_SIZE / MOSHI_SAMPLE_RATE  # Duration of one chunk in seconds
+MOSHI_OUTPUT_JITTER_SAMPLES = MOSHI_SAMPLE_RATE // 5  # 200ms of headroom in the output ring buffer
+MOSHI_AUDIO_QUEUE_MAX_CHUNKS = 64  # ~5s of 80ms chunks buffered in the audio output queue
 
 # Moshi generation parameters (same as Web interface defaults)
 MOSHI_DEFAULT_TEXT_TEMPERATURE = 0.7
@@ -138,14 +140,15 @@ class OggContainer:
         # Segment table
         segment_table = bytes([min(len(packet_data), 255)])
 
-        # Complete page without CRC
-        page_without_crc = header + segment_table + packet_data
+        # Complete page without CRC, assembled in a single buffer
+        page = bytearray(header)
+        page += segment_table
+        page += packet_data
 
-        # Calculate CRC
-        crc = self._calculate_crc(page_without_crc)
-
-        # Insert CRC into header
-        page = page_without_crc[:22] + struct.pack("<I", crc) + page_without_crc[26:]
+        # Calculate CRC and write it into the header in place
+        crc = self._calculate_crc(page)
+        struct.pack_into("<I", page, 22, crc)
+        page = bytes(page)
 
         self.page_sequence += 1
         return page
@@ -210,8 +213,12 @@ class OpusEncoder:
         if audio_data is None or len(audio_data) == 0:
             return []
 
-        # Add to buffer
-        self.audio_buffer = np.concatenate([self.audio_buffer, audio_data])
+        # Add to buffer (input normally arrives in whole frames, so avoid the copy
+        # when there is no residue from the previous call)
+        if len(self.audio_buffer) == 0:
+            self.audio_buffer = audio_data
+        else:
+            self.audio_buffer = np.concatenate([self.audio_buffer, audio_data])
 
         pages = []
 
@@ -221,12 +228,12 @@ class OpusEncoder:
             frame = self.audio_buffer[: self.frame_size]
             self.audio_buffer = self.audio_buffer[self.frame_size :]
 
-            # Convert to 16-bit PCM for Opus
-            pcm_data = (frame * 32767).astype(np.int16)
-
             try:
-                # Encode with Opus
-                opus_packet = self.encoder.encode(pcm_data.tobytes(), self.frame_size)
+                # Encode float32 PCM directly (no 16-bit conversion temporaries)
+                opus_packet = self.encoder.encode_float(
+                    np.ascontiguousarray(frame, dtype=np.float32).tobytes(),
+                    self.frame_size,
+                )
 
                 # Create Ogg page
                 ogg_page = self.ogg_container.create_audio_page(
@@ -469,6 +476,92 @@ class OpusDecoder:
             del self.decoder
 
 
+class AudioRingBuffer:
+    """
+    Single-producer/single-consumer ring buffer of float32 samples.
+
+    The storage is allocated once, so write() and read_into() never allocate.
+    Only the producer advances the write index and only the consumer advances
+    the read index (each after its copy has completed), which lets one writer
+    thread and one reader thread share the buffer without a lock.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError(f"Ring buffer capacity must be positive: {capacity}")
+        self.capacity = capacity
+        self._buffer = np.zeros(capacity, dtype=np.float32)
+        self._write_index = 0  # Total samples written (owned by the producer)
+        self._read_index = 0  # Total samples read (owned by the consumer)
+
+    def __len__(self) -> int:
+        """Number of samples available for reading"""
+        return self._write_index - self._read_index
+
+    def free_space(self) -> int:
+        """Number of samples that can be written without overwriting unread data"""
+        return self.capacity - len(self)
+
+    def write(self, data: np.ndarray) -> int:
+        """Copy samples into the buffer (producer side), returns the number written"""
+        count = min(len(data), self.free_space())
+        if count <= 0:
+            return 0
+
+        start = self._write_index % self.capacity
+        first = min(count, self.capacity - start)
+        np.copyto(self._buffer[start : start + first], data[:first], casting="same_kind")
+        if count > first:
+            np.copyto(self._buffer[: count - first], data[first:count], casting="same_kind")
+
+        # Publish the samples only after they are in place
+        self._write_index += count
+        return count
+
+    def read_into(self, out: np.ndarray) -> int:
+        """Copy up to len(out) samples into out (consumer side), returns the number read"""
+        count = min(len(out), len(self))
+        if count <= 0:
+            return 0
+
+        start = self._read_index % self.capacity
+        first = min(count, self.capacity - start)
+        np.copyto(out[:first], self._buffer[start : start + first])
+        if count > first:
+            np.copyto(out[first:count], self._buffer[: count - first])
+
+        # Release the space only after the samples have been copied out
+        self._read_index += count
+        return count
+
+    def clear(self):
+        """Discard all unread samples (consumer side)"""
+        self._read_index = self._write_index
+
+
+class SnapshotQueue(janus.Queue):
+    """
+    janus.Queue whose items can be inspected without consuming them.
+
+    janus has no public API for this, so snapshot() reads the private _sync_mutex
+    and _queue attributes. These exist in janus 2.x (the range pinned in
+    pyproject.toml) and are checked before use. Puts and gets still go through
+    the public API: they also have to notify the other side of the queue.
+    """
+
+    def snapshot(self) -> list:
+        """Return a list of the queued items, taken under a single lock acquisition"""
+        mutex = getattr(self, "_sync_mutex", None)
+        items = getattr(self, "_queue", None)
+        if mutex is None or items is None:
+            raise RuntimeError(
+                f"SnapshotQueue.snapshot() needs janus.Queue internals (_sync_mutex, _queue) "
+                f"that janus {getattr(janus, '__version__', '(unknown version)')} does not have"
+            )
+        with mutex:
+            return list(items)
+
+
 class MoshiClient:
     """
     Moshi Client Library (Thread-based)
@@ -501,6 +594,7 @@ class MoshiClient:
         repetition_penalty=MOSHI_DEFAULT_REPETITION_PENALTY,
         repetition_penalty_context=MOSHI_DEFAULT_REPETITION_PENALTY_CONTEXT,
         output_buffer_size=MOSHI_CHUNK_SIZE,
+        send_batch_ms=0,
     ):
         """
         Initialize MoshiClient with generation parameters.
@@ -514,6 +608,11 @@ class MoshiClient:
             repetition_penalty: Repetition penalty (1.0-2.0, default: 1.0)
             repetition_penalty_context: Repetition penalty context (0-200, default: 64)
             output_buffer_size: Size of audio chunks returned by get_audio_output (default: 1920)
+            send_batch_ms: Coalesce this much input audio into one WebSocket message
+                (default: 0 = one message per 80ms frame). Ogg pages are self-delimiting,
+                so batched pages are simply concatenated. Larger values reduce per-message
+                framing/TLS overhead but add up to the batch duration of input latency:
+                a partial batch is sent once its oldest frame has waited send_batch_ms.
         """
         # Generation parameters
         self.text_temperature = text_temperature
@@ -523,26 +622,40 @@ class MoshiClient:
         self.pad_mult = pad_mult
         self.repetition_penalty = repetition_penalty
         self.repetition_penalty_context = repetition_penalty_context
-        self.output_buffer_size = output_buffer_size
+        self._output_buffer_size = output_buffer_size
+        self.send_batch_ms = send_batch_ms
+        self._send_batch_pages = max(
+            1, round(send_batch_ms / (MOSHI_CHUNK_DURATION_SEC * 1000))
+        )  # Ogg pages (80ms frames) per WebSocket message
 
         # Thread-safe queues for communication
-        self.audio_input_queue = janus.Queue()  # Input: PCM data to send
-        self.audio_output_queue = janus.Queue()  # Output: Received PCM data
+        # The input queue is unbounded: add_audio_input accepts any amount of audio
+        # and the sender drains it at real-time speed. The output queue is bounded
+        # so a stalled get_audio_output() caller drops frames instead of growing
+        # without limit.
+        self.audio_input_queue = SnapshotQueue()  # Input: PCM data to send
+        self.audio_output_queue = janus.Queue(
+            maxsize=MOSHI_AUDIO_QUEUE_MAX_CHUNKS
+        )  # Output: Received PCM data
         self.text_output_queue = janus.Queue()  # Output: Text responses
 
         # Audio buffering for arbitrary-length input/output
-        self._input_audio_buffer = np.array(
-            [], dtype=np.float32
-        )  # Buffer for input audio
-        self._output_audio_buffer = np.array(
-            [], dtype=np.float32
-        )  # Buffer for output audio
+        self._input_audio_buffer = np.empty(
+            MOSHI_CHUNK_SIZE, dtype=np.float32
+        )  # Preallocated buffer for the partial input chunk
+        self._input_buf_len = 0  # Number of valid samples in _input_audio_buffer
+        self._enqueued_chunks = 0  # Chunks put on audio_input_queue (written only by add_audio_input)
+        self._dropped_output_chunks = 0  # Received chunks dropped because audio_output_queue was full
+        self._output_audio_buffer = AudioRingBuffer(
+            output_buffer_size + MOSHI_OUTPUT_JITTER_SAMPLES
+        )  # Buffer for output audio (preallocated, no per-call concatenation)
         self._buffer_lock = threading.Lock()  # Lock for thread-safe buffer access
 
         # Thread management
         self._communication_thread = None
         self._running = threading.Event()
         self._connected = threading.Event()
+        self._output_closed = threading.Event()  # Set by disconnect(): get_audio_output stops blocking
 
         # Internal components (used by communication thread)
         self._websocket = None
@@ -599,6 +712,7 @@ class MoshiClient:
             raise RuntimeError("Client is already connected")
 
         logger.info("Starting MoshiClient connection...")
+        self._output_closed.clear()
 
         # Start communication thread
         self._communication_thread = threading.Thread(
@@ -612,15 +726,45 @@ class MoshiClient:
             raise RuntimeError("Connection timeout")
 
         # Clear all buffers and queues
-        self._input_audio_buffer = np.array([], dtype=np.float32)
-        self._output_audio_buffer = np.array([], dtype=np.float32)
-        while not self.audio_output_queue.sync_q.empty():
-            self.audio_output_queue.sync_q.get_nowait()
-        while not self.text_output_queue.sync_q.empty():
-            self.text_output_queue.sync_q.get_nowait()
+        self.reset_buffers()
 
         logger.info("MoshiClient connected successfully")
 
+    def reset_buffers(self):
+        """
+        Discard all buffered audio and text and reset the input chunking state.
+
+        Called by connect(); also lets one client be reused across offline test
+        cases instead of constructing a new one each time.
+        """
+        self._input_buf_len = 0
+        self._enqueued_chunks = 0
+        self._dropped_output_chunks = 0
+        self._output_audio_buffer.clear()
+        for q in (self.audio_input_queue, self.audio_output_queue, self.text_output_queue):
+            while True:
+                try:
+                    q.sync_q.get_nowait()
+                except queue.Empty:
+                    break
+
+    @property
+    def output_buffer_size(self) -> int:
+        """Size of audio chunks returned by get_audio_output"""
+        return self._output_buffer_size
+
+    @output_buffer_size.setter
+    def output_buffer_size(self, size: int):
+        """Change the get_audio_output chunk size (not while another thread is reading)"""
+        required_capacity = size + MOSHI_OUTPUT_JITTER_SAMPLES
+        if self._output_audio_buffer.capacity < required_capacity:
+            # Grow the ring buffer, keeping any audio already buffered
+            buffered = np.empty(len(self._output_audio_buffer), dtype=np.float32)
+            self._output_audio_buffer.read_into(buffered)
+            self._output_audio_buffer = AudioRingBuffer(required_capacity)
+            self._output_audio_buffer.write(buffered)
+        self._output_buffer_size = size
+
     def disconnect(self):
         """Disconnect from Moshi server (synchronous)"""
         logger.info("Disconnecting MoshiClient...")
@@ -635,9 +779,24 @@ class MoshiClient:
         # Clear connection flag regardless of prior state
         self._connected.clear()
 
+        if self._dropped_output_chunks:
+            logger.warning(
+                f"{self._dropped_output_chunks} received audio chunk(s) were dropped "
+                f"because audio_output_queue was full"
+            )
+
+        # Stop get_audio_output() from blocking from now on, and wake a call
+        # already blocked on an empty queue. If the queue is full, no reader is
+        # blocked, and later calls see the flag and only drain what is left.
+        self._output_closed.set()
+        try:
+            self.audio_output_queue.sync_q.put_nowait(None)
+        except queue.Full:
+            pass
+
         logger.info("MoshiClient disconnected")
 
-    def add_audio_input(self, audio_data: np.ndarray):
+    def add_audio_input(self, audio_data: np.ndarray, copy: bool = True):
         """
         Add PCM audio data to input queue (thread-safe, arbitrary length).
 
@@ -646,6 +805,11 @@ class MoshiClient:
 
         Args:
             audio_data: PCM audio data as numpy array (float32, mono, 24kHz)
+            copy: If False, complete chunks taken from a contiguous audio_data are
+                queued as views of it instead of copies, so the caller must not
+                modify audio_data afterwards. With CHUNK_SIZE input and no buffered
+                remainder this queues a single view with no copy. Strided input is
+                still copied once, into contiguous chunks.
         """
         if not self.is_connected():
             logger.warning("Client is not connected, ignoring audio input")
@@ -654,27 +818,49 @@ class MoshiClient:
         if audio_data is None or len(audio_data) == 0:
             return
 
-        # Ensure correct format
+        # Ensure correct format (the converted array is our own, so it needs no copy)
         if audio_data.dtype != np.float32:
             audio_data = audio_data.astype(np.float32)
+            copy = False
 
-        # Add new audio data to input buffer
-        self._input_audio_buffer = np.concatenate(
-            [self._input_audio_buffer, audio_data]
-        )
-
-        # Send complete chunks to the server
-        while len(self._input_audio_buffer) >= MOSHI_CHUNK_SIZE:
-            # Extract one chunk
-            chunk = self._input_audio_buffer[:MOSHI_CHUNK_SIZE].copy()
-            self._input_audio_buffer = self._input_audio_buffer[MOSHI_CHUNK_SIZE:]
+        chunks = []
+        offset = 0
 
-            # Send chunk to encoder queue
-            try:
-                self.audio_input_queue.sync_q.put_nowait(chunk)
-            except queue.Full:
-                logger.warning("Audio input queue full, dropping frame")
-                break
+        # Top up the partial chunk left over from previous calls
+        if self._input_buf_len > 0:
+            offset = min(MOSHI_CHUNK_SIZE - self._input_buf_len, len(audio_data))
+            np.copyto(
+                self._input_audio_buffer[self._input_buf_len : self._input_buf_len + offset],
+                audio_data[:offset],
+            )
+            self._input_buf_len += offset
+            if self._input_buf_len < MOSHI_CHUNK_SIZE:
+                return
+            # Hand the completed buffer itself to the sender instead of copying it
+            chunks.append(self._input_audio_buffer)
+            self._input_audio_buffer = np.empty(MOSHI_CHUNK_SIZE, dtype=np.float32)
+            self._input_buf_len = 0
+
+        # Take all further complete chunks straight from the input in one block:
+        # a single copy gives the sender owned data, each row is one chunk.
+        # Without copy the rows are views (of contiguous input), which the caller
+        # promised not to modify.
+        full = (len(audio_data) - offset) // MOSHI_CHUNK_SIZE
+        if full > 0:
+            end = offset + full * MOSHI_CHUNK_SIZE
+            rows = audio_data[offset:end].reshape(full, MOSHI_CHUNK_SIZE)
+            chunks.extend(rows.copy() if copy else np.ascontiguousarray(rows))
+            offset = end
+
+        # Keep the remainder in the preallocated buffer for the next call
+        remainder = len(audio_data) - offset
+        np.copyto(self._input_audio_buffer[:remainder], audio_data[offset:])
+        self._input_buf_len = remainder
+
+        # Send complete chunks to encoder queue
+        for chunk in chunks:
+            self.audio_input_queue.sync_q.put_nowait(chunk)
+            self._enqueued_chunks += 1
 
     def get_audio_output(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
         """
@@ -684,60 +870,56 @@ class MoshiClient:
         or until timeout expires.
 
         Args:
-            timeout: Maximum time to wait for data in seconds. If None, waits indefinitely.
-                    If 0, returns immediately (non-blocking).
+            timeout: Maximum time to wait for data in seconds. If None, waits until data
+                    arrives or disconnect() is called; after disconnect() it only returns
+                    audio that is already queued. If 0, returns immediately (non-blocking).
 
         Returns:
             PCM audio data as numpy array (float32, mono, 24kHz) with length=output_buffer_size,
-            or None if timeout expires before enough data is available
+            or None if timeout expires before enough data is available or the client
+            is disconnected while waiting
         """
         start_time = time.time()
         logger.debug(f"get_audio_output called with timeout={timeout}")
 
-        def remaining_timeout() -> Optional[float]:
-            if timeout is None:
-                return None
-            return max(timeout - (time.time() - start_time), 0)
-
-        while True:
-            if len(self._output_audio_buffer) >= self.output_buffer_size:
-                # Extract the requested amount
-                result = self._output_audio_buffer[: self.output_buffer_size].copy()
-                old_buffer_size = len(self._output_audio_buffer)
-                self._output_audio_buffer = self._output_audio_buffer[
-                    self.output_buffer_size :
-                ]
-                new_buffer_size = len(self._output_audio_buffer)
-                logger.info(
-                    f"📤 get_audio_output: extracted {len(result)} samples, buffer: {old_buffer_size} → {new_buffer_size}"
-                )
-                return result
-
-            # Try to get more data from the audio output queue
+        while len(self._output_audio_buffer) < self.output_buffer_size:
+            # Get more data from the audio output queue: without a timeout this
+            # blocks until data or the shutdown sentinel arrives (no periodic wakeups)
             try:
-                new_data = self.audio_output_queue.sync_q.get(
-                    timeout=remaining_timeout()
-                )
-                if new_data is not None and len(new_data) > 0:
-                    # Append new data to output buffer
-                    self._output_audio_buffer = np.concatenate(
-                        [self._output_audio_buffer, new_data]
-                    )
-                    logger.debug(
-                        f"📥 get_audio_output: received {len(new_data)} samples, buffer size now {len(self._output_audio_buffer)}"
+                if timeout is None and not self._output_closed.is_set():
+                    new_data = self.audio_output_queue.sync_q.get()
+                elif timeout is None or timeout == 0:
+                    new_data = self.audio_output_queue.sync_q.get_nowait()
+                else:
+                    new_data = self.audio_output_queue.sync_q.get(
+                        timeout=max(timeout - (time.time() - start_time), 0)
                     )
             except queue.Empty:
-                pass
+                return None  # No data available within timeout
 
-            # Check timeout
-            if timeout is not None:
-                if timeout == 0:
-                    return None  # Non-blocking mode, no data available
-                elif time.time() - start_time >= timeout:
-                    return None  # Timeout expired
+            if new_data is None:
+                return None  # Shutdown sentinel put by disconnect()
 
-            # # Small sleep to prevent busy waiting and allow decoder to process more data
-            # time.sleep(0.001)
+            if len(new_data) > 0:
+                # Append new data to output buffer
+                written = self._output_audio_buffer.write(new_data)
+                if written < len(new_data):
+                    logger.warning(
+                        f"Output audio buffer full, dropping {len(new_data) - written} samples"
+                    )
+                logger.debug(
+                    f"📥 get_audio_output: received {len(new_data)} samples, buffer size now {len(self._output_audio_buffer)}"
+                )
+
+        # Extract the requested amount
+        result = np.empty(self.output_buffer_size, dtype=np.float32)
+        old_buffer_size = len(self._output_audio_buffer)
+        self._output_audio_buffer.read_into(result)
+        new_buffer_size = len(self._output_audio_buffer)
+        logger.info(
+            f"📤 get_audio_output: extracted {len(result)} samples, buffer: {old_buffer_size} → {new_buffer_size}"
+        )
+        return result
 
     def get_text_output(self, timeout: Optional[float] = None) -> Optional[str]:
         """
@@ -933,22 +1115,47 @@ class MoshiClient:
             return
 
         sent_chunks = 0
+        pending_pages = []  # Ogg pages waiting to be sent as one batched message
+        flush_deadline = None  # Loop time by which the oldest pending page must be sent
+        loop = asyncio.get_running_loop()
         try:
             while self._running.is_set():
                 try:
-                    # Get audio data from thread-safe queue with a maximum wait time
-                    audio_data = await self.audio_input_queue.async_q.get()
-
-                    # Encode to Opus and wrap in Ogg pages
-                    ogg_pages = self._encoder.encode(audio_data)
-
-                    # Send each Ogg page
-                    for ogg_page in ogg_pages:
+                    if pending_pages:
+                        # A partial batch is waiting: don't hold it past its deadline
+                        # if the input pauses or has ended
+                        try:
+                            audio_data = await asyncio.wait_for(
+                                self.audio_input_queue.async_q.get(),
+                                max(flush_deadline - loop.time(), 0),
+                            )
+                        except asyncio.TimeoutError:
+                            audio_data = None
+                    else:
+                        # Nothing pending: block until audio arrives
+                        audio_data = await self.audio_input_queue.async_q.get()
+
+                    if audio_data is not None:
+                        # Encode to Opus and wrap in Ogg pages
+                        if not pending_pages:
+                            flush_deadline = loop.time() + self.send_batch_ms / 1000
+                        pending_pages.extend(self._encoder.encode(audio_data))
+
+                    # Send the Ogg pages, send_batch_pages at a time (or whatever is
+                    # pending once the deadline has passed)
+                    while pending_pages and (
+                        len(pending_pages) >= self._send_batch_pages
+                        or loop.time() >= flush_deadline
+                    ):
                         if not self._running.is_set():
                             break
-                        sent_chunks += 1
-                        send_time = time.time()
-                        await self._websocket.send(b"\x01" + ogg_page)
+                        batch = pending_pages[: self._send_batch_pages]
+                        del pending_pages[: self._send_batch_pages]
+                        sent_chunks += len(batch)
+                        await self._websocket.send(b"\x01" + b"".join(batch))
+                        if pending_pages:
+                            # The leftover pages are newer; give them a full batch period
+                            flush_deadline = loop.time() + self.send_batch_ms / 1000
 
                 except Exception as e:
                     if self._running.is_set():
@@ -957,6 +1164,14 @@ class MoshiClient:
         except Exception as e:
             logger.error(f"Sender loop error: {e}")
         finally:
+            # Send the last partial batch instead of discarding it (best effort:
+            # the connection may already be gone)
+            if pending_pages and self._websocket:
+                try:
+                    await self._websocket.send(b"\x01" + b"".join(pending_pages))
+                    sent_chunks += len(pending_pages)
+                except Exception as e:
+                    logger.debug(f"Could not flush {len(pending_pages)} pending pages: {e}")
             logger.info(f"→ Sender loop ended, total chunks sent: {sent_chunks}")
 
     async def _receiver_loop(self):
@@ -1029,7 +1244,14 @@ class MoshiClient:
                         try:
                             self.audio_output_queue.async_q.put_nowait(audio_data)
                         except asyncio.QueueFull:
-                            logger.debug("Audio output queue full")
+                            # Audible gap: warn on the first drop, then every 100th
+                            self._dropped_output_chunks += 1
+                            if self._dropped_output_chunks % 100 == 1:
+                                logger.warning(
+                                    f"Audio output queue full, dropped received audio "
+                                    f"({self._dropped_output_chunks} chunk(s) so far); "
+                                    f"is get_audio_output() being called often enough?"
+                                )
                     else:
                         logger.warning(
                             f"❌ Decode failed for payload #{self._audio_msg_count}: {len(payload)} bytes"
@@ -1074,4 +1296,10 @@ class MoshiClient:
 
 
 # Export main class
-__all__ = ["MoshiClient", "MOSHI_SAMPLE_RATE", "MOSHI_CHANNELS", "MOSHI_CHUNK_SIZE"]
+__all__ = [
+    "MoshiClient",
+    "AudioRingBuffer",
+    "MOSHI_SAMPLE_RATE",
+    "MOSHI_CHANNELS",
+    "MOSHI_CHUNK_SIZE",
+]
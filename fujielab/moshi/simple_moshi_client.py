@@ -18,17 +18,25 @@ Usage examples:
 
     # Tune MOSHI generation parameters
     python simple_moshi_client.py --text-temperature 0.5 --audio-temperature 0.7 --text-topk 40
+
+Latency notes:
+- Both streams request a latency of one block (buffer size / sample rate).
+- The callback threads try to switch to SCHED_FIFO on Linux; this silently
+  does nothing without the required privileges (e.g. CAP_SYS_NICE).
+- PortAudio's host-side minimum latency can be lowered further with the
+  PA_MIN_LATENCY_MSEC environment variable, e.g. PA_MIN_LATENCY_MSEC=20.
 """
 
 import sounddevice as sd
 import numpy as np
 import logging
+import os
 import signal
-import time
+import threading
 import soxr
 import argparse
 
-from .moshi_client_lib import MoshiClient, MOSHI_SAMPLE_RATE, MOSHI_CHANNELS
+from .moshi_client_lib import MoshiClient, AudioRingBuffer, MOSHI_SAMPLE_RATE, MOSHI_CHANNELS
 
 # Simple logging setup
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
@@ -85,6 +93,10 @@ if __name__ == "__main__":
         quality='VHQ',
     )
 
+    # When the I/O rate matches the model rate, get_audio_output() blocks can be
+    # played as they are and the output pump skips resampling
+    direct_output = AUDIO_IO_SAMPLE_RATE == MOSHI_SAMPLE_RATE
+
     # Initialize components
     client = MoshiClient(
         text_temperature=args.text_temperature,
@@ -96,83 +108,101 @@ if __name__ == "__main__":
         repetition_penalty_context=args.repetition_penalty_context,
         output_buffer_size=BUFFER_SIZE,
     )
-    audio_queue = []  # Simple list to store received audio
-    running = True
+    # Audio ready for playback at the I/O rate. Filled by the output pump thread,
+    # drained by the output callback; sized for two blocks plus 200ms of jitter.
+    output_ring = AudioRingBuffer(2 * BUFFER_SIZE + AUDIO_IO_SAMPLE_RATE // 5)
+    underrun_count = 0  # Output blocks played as silence because no audio was ready
+    shutdown_event = threading.Event()  # Set on Ctrl+C, callback errors, or cleanup
+
+    # Realtime scheduling is requested once, from inside each callback thread
+    realtime_priority_requested = {"input": False, "output": False}
+
+    def request_realtime_priority(stream_name):
+        if realtime_priority_requested[stream_name]:
+            return
+        realtime_priority_requested[stream_name] = True
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(10))
+            logger.debug(f"{stream_name} callback thread switched to SCHED_FIFO")
+        except (AttributeError, OSError) as e:  # Not Linux, or not permitted
+            logger.debug(f"Could not raise {stream_name} callback thread priority: {e}")
 
     # Audio input callback - records from microphone
     def audio_input_callback(indata, frames, time, status):
+        request_realtime_priority("input")
         if status:
             logger.warning(f"Input status: {status}")
-        if running:
-            # Convert to mono and send to client
-            mono_audio = np.mean(indata, axis=1) if indata.ndim > 1 else indata
-
-            # Ensure float32 for soxr stream
-            mono_audio = mono_audio.astype(np.float32, copy=False)
+        if not shutdown_event.is_set():
+            # The stream is opened with MOSHI_CHANNELS (mono), so channel 0 is passed
+            # on as a view without a downmix (the resampler copies its input)
+            mono_audio = indata[:, 0]
 
             # Resample to model sample rate
             resampled_mono_audio = input_resampler.resample_chunk(mono_audio, last=False)
 
-            client.add_audio_input(resampled_mono_audio.astype(np.float32, copy=False))
+            # soxr returns a new float32 array per call that is not reused, so the
+            # client may queue it without copying
+            client.add_audio_input(resampled_mono_audio, copy=False)
+
+    # Output pump - moves received audio from the client into output_ring, so the
+    # realtime callback never touches queues, the resampler, or allocations
+    def output_pump():
+        try:
+            while not shutdown_event.is_set():
+                # Sleeps until audio arrives; disconnect() wakes it with None
+                received_audio = client.get_audio_output()
+                if received_audio is None:
+                    if not client.is_connected():
+                        break
+                    continue
+
+                if not direct_output:
+                    # Resample (get_audio_output already returns float32) to audio I/O sample rate
+                    received_audio = output_resampler.resample_chunk(received_audio, last=False)
+
+                # Wait for the callback to make room rather than dropping audio
+                written = output_ring.write(received_audio)
+                while written < len(received_audio) and not shutdown_event.wait(BUFFER_SIZE / AUDIO_IO_SAMPLE_RATE):
+                    written += output_ring.write(received_audio[written:])
+
+        except Exception as e:
+            logger.error(f"Error in output pump: {e} - stopping client")
+            shutdown_event.set()
 
     # Audio output callback - plays received audio
-    audio_buffer = np.zeros((0,), dtype=np.float32)  # Buffer to hold leftover audio between calls
     def audio_output_callback(outdata, frames, time, status):
-        global running, audio_buffer
+        global underrun_count
+        request_realtime_priority("output")
         if status:
             logger.warning(f"Output status: {status}")
 
-        outdata.fill(0)  # Start with silence
-
         # If we are shutting down or already disconnected, do nothing to avoid noisy errors
-        if not running or not client.is_connected():
+        if shutdown_event.is_set() or not client.is_connected():
+            outdata.fill(0)
             return
 
         try:
-            received_audio = None
-            while len(audio_buffer) < frames and running and client.is_connected():
-                # Get audio from client and play it
-                received_audio = client.get_audio_output(timeout=5)  # Block and wait
-
-                if received_audio is not None:
-                    # Ensure float32 for soxr stream
-                    received_audio = received_audio.astype(np.float32, copy=False)
-
-                    # Resample to audio I/O sample rate
-                    resampled_received_audio = output_resampler.resample_chunk(received_audio, last=False)
-
-                    audio_buffer = np.concatenate((audio_buffer, resampled_received_audio))
-
-            # If we are shutting down while waiting for data, exit quietly
-            if not running or not client.is_connected():
-                return
-
-            if len(audio_buffer) < frames and received_audio is None:
-                logger.debug("Shutting down: no more audio available")
-                running = False
+            # Not enough audio yet: play silence and keep the buffered audio for
+            # the next block
+            if len(output_ring) < frames:
+                outdata.fill(0)
+                underrun_count += 1
+                logger.debug(f"Output underrun #{underrun_count}: {len(output_ring)}/{frames} frames ready")
                 return
 
-            audio_to_play = audio_buffer[:frames]
-            audio_buffer = audio_buffer[frames:]
-
-            if len(audio_to_play) != frames:
-                logger.error(
-                    f"Audio frame size mismatch: received {len(audio_to_play)}, expected {frames} - stopping client"
-                )
-                running = False
-                return
-
-            outdata[:, 0] = audio_to_play
+            # A full block is available and overwrites every sample of the (mono)
+            # output, so no silence pre-fill is needed on this path
+            output_ring.read_into(outdata[:, 0])
 
         except Exception as e:
+            outdata.fill(0)
             logger.error(f"Error in audio output callback: {e} - stopping client")
-            running = False
+            shutdown_event.set()
 
     # Signal handler for clean shutdown
     def signal_handler(signum, frame):
-        global running
         print("\n🛑 Stopping...")
-        running = False
+        shutdown_event.set()
 
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
@@ -180,6 +210,7 @@ if __name__ == "__main__":
     # Initialize stream variables
     input_stream = None
     output_stream = None
+    output_pump_thread = None
 
     try:
         # Connect to Moshi server
@@ -195,9 +226,14 @@ if __name__ == "__main__":
             callback=audio_input_callback,
             blocksize=BUFFER_SIZE,
             dtype=np.float32,
+            latency=BUFFER_SIZE / AUDIO_IO_SAMPLE_RATE,  # One block, instead of the host default
         )
         input_stream.start()
 
+        # Start the output pump before the speakers so audio is buffered early
+        output_pump_thread = threading.Thread(target=output_pump, daemon=True)
+        output_pump_thread.start()
+
         # Start audio output stream (speakers)
         print("🔊 Starting speakers...")
         output_stream = sd.OutputStream(
@@ -206,6 +242,7 @@ if __name__ == "__main__":
             callback=audio_output_callback,
             blocksize=BUFFER_SIZE,
             dtype=np.float32,
+            latency=BUFFER_SIZE / AUDIO_IO_SAMPLE_RATE,  # One block, instead of the host default
         )
         output_stream.start()
 
@@ -213,24 +250,23 @@ if __name__ == "__main__":
 
         # Simple text output loop
         message_count = 0
-        while running and client.is_connected():
-            # Check for text responses
-            text_response = client.get_text_output(timeout=0.5)  # Non-blocking-ish so Ctrl+C can break the loop
+        while not shutdown_event.is_set() and client.is_connected():
+            # Sleep until text arrives; the timeout bounds the shutdown latency
+            text_response = client.get_text_output(timeout=0.5)
             if text_response:
                 message_count += 1
                 print(f"💬 Moshi #{message_count}: {text_response}")
 
-            # # Small delay to prevent busy waiting
-            # time.sleep(0.01)
-
     except KeyboardInterrupt:
         print("\n🛑 Interrupted by user")
     except Exception as e:
         print(f"❌ Error: {e}")
     finally:
         # Cleanup
-        running = False
+        shutdown_event.set()
         print("🧹 Cleaning up...")
+        if underrun_count:
+            print(f"⚠️ Output underruns: {underrun_count} block(s) played as silence")
 
         try:
             if input_stream is not None:
@@ -254,5 +290,9 @@ if __name__ == "__main__":
         except:
             pass
 
+        # disconnect() wakes the pump if it is waiting for audio
+        if output_pump_thread is not None:
+            output_pump_thread.join(timeout=1.0)
+
         print("✅ Cleanup complete")
         print("👋 Goodbye!")
@@ -16,14 +16,13 @@ import numpy as np
 import time
 import asyncio
 from fujielab.moshi.moshi_client_lib import MoshiClient, MOSHI_SAMPLE_RATE
+from script_helpers import sine_tone
 
 
 def generate_test_audio(duration_ms, frequency=440):
     """Generate test audio with specified duration in milliseconds"""
     samples = int(MOSHI_SAMPLE_RATE * duration_ms / 1000)
-    t = np.arange(samples) / MOSHI_SAMPLE_RATE
-    audio = np.sin(2 * np.pi * frequency * t).astype(np.float32) * 0.1
-    return audio
+    return sine_tone(samples, frequency)
 
 
 async def enhanced_client_example():
@@ -166,10 +165,10 @@ def demonstrate_offline_features(client):
     for size in sizes:
         audio = generate_test_audio(size / MOSHI_SAMPLE_RATE * 1000)
         client.add_audio_input(audio)
-        queue_items = client.audio_input_queue.qsize()
-        buffer_samples = len(client._input_audio_buffer)
+        enqueued_chunks = client._enqueued_chunks
+        buffer_samples = client._input_buf_len
         print(
-            f"   Added {size} samples -> Queue: {queue_items} items, Buffer: {buffer_samples} samples"
+            f"   Added {size} samples -> Enqueued so far: {enqueued_chunks} chunks, Buffer: {buffer_samples} samples"
         )
 
     # Show output buffering simulation
@@ -177,7 +176,7 @@ def demonstrate_offline_features(client):
     # Add some test audio to output queue
     for i in range(3):
         test_audio = generate_test_audio(20, 440 + i * 110)  # 20ms chunks
-        client.audio_output_queue.put_nowait(test_audio)
+        client.audio_output_queue.sync_q.put_nowait(test_audio)
 
     # Try to get configured output size
     result = client.get_audio_output(timeout=0.1)
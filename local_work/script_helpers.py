@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Helpers shared by the local_work test and example scripts
+"""
+
+import contextlib
+import functools
+import io
+import sys
+
+import numpy as np
+from fujielab.moshi.moshi_client_lib import MOSHI_SAMPLE_RATE
+
+# Float32 constants for test tone generation (multiply instead of divide)
+INV_SR = np.float32(1.0 / MOSHI_SAMPLE_RATE)
+TWO_PI_F = np.float32(2 * np.pi)
+
+
+def sine_tone(samples, frequency=440, amplitude=0.1):
+    """Generate a float32 sine tone at MOSHI_SAMPLE_RATE, starting at phase 0"""
+    # Work in float32 and in place: no float64 temporaries, one output array
+    audio = np.arange(samples, dtype=np.float32)
+    audio *= TWO_PI_F * np.float32(frequency) * INV_SR
+    np.sin(audio, out=audio)
+    audio *= np.float32(amplitude)
+    return audio
+
+
+def buffered_output(func):
+    """Collect a test's prints in memory and write them to stdout once at the end"""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        out = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(out):
+                return func(*args, **kwargs)
+        finally:
+            sys.stdout.write(out.getvalue())
+
+    return wrapper
@@ -6,9 +6,14 @@ Test script for MoshiClient buffering functionality
 import numpy as np
 import time
 import threading
-from fujielab.moshi.moshi_client_lib import MoshiClient, MOSHI_SAMPLE_RATE, MOSHI_CHUNK_SIZE
+from fujielab.moshi.moshi_client_lib import AudioRingBuffer, MoshiClient, MOSHI_SAMPLE_RATE, MOSHI_CHUNK_SIZE
+from script_helpers import buffered_output, sine_tone
 
+# Shared generator: float32 output directly, no legacy global-state RandomState
+rng = np.random.default_rng(0)
 
+
+@buffered_output
 def test_input_buffering():
     """Test arbitrary length input buffering"""
     print("=== Testing Input Buffering ===")
@@ -22,38 +27,31 @@ def test_input_buffering():
 
     for size in test_sizes:
         # Create test audio data
-        test_audio = np.random.randn(size).astype(np.float32) * 0.1
+        test_audio = rng.standard_normal(size, dtype=np.float32)
+        test_audio *= 0.1
 
         print(f"\nTesting input size: {size}")
-        print(f"Input buffer before: {len(client._input_audio_buffer)}")
+        print(f"Input buffer before: {client._input_buf_len}")
 
         # Add audio input (this should buffer internally)
         client.add_audio_input(test_audio)
 
-        print(f"Input buffer after: {len(client._input_audio_buffer)}")
-        print(f"Items in audio_input_queue: {client.audio_input_queue.qsize()}")
-
-        # Check that queue only has CHUNK_SIZE items
-        total_queued = 0
-        temp_items = []
-        while not client.audio_input_queue.empty():
-            try:
-                item = client.audio_input_queue.get_nowait()
-                temp_items.append(item)
-                total_queued += len(item)
-                print(f"  Queue item size: {len(item)}")
-            except:
-                break
-
-        # Put items back
-        for item in temp_items:
-            client.audio_input_queue.put_nowait(item)
+        print(f"Input buffer after: {client._input_buf_len}")
+        print(f"Chunks enqueued so far: {client._enqueued_chunks}")
+
+        # Check that queue only has CHUNK_SIZE items. Snapshot the queue under a
+        # single lock acquisition instead of draining and refilling it.
+        items = client.audio_input_queue.snapshot()
+        total_queued = sum(len(item) for item in items)
+        for item in items:
+            print(f"  Queue item size: {len(item)}")
 
         print(f"Total samples in queue: {total_queued}")
 
     print("\n✅ Input buffering test completed")
 
 
+@buffered_output
 def test_output_buffering():
     """Test configurable output buffering with timeout"""
     print("\n=== Testing Output Buffering ===")
@@ -69,11 +67,12 @@ def test_output_buffering():
         def add_audio_data():
             """Simulate audio data arriving"""
             time.sleep(0.1)  # Small delay
-            for i in range(5):
-                # Create chunks of audio data
-                audio_chunk = np.random.randn(480).astype(np.float32) * 0.1
+            # Create all chunks in one allocation; each row is a separate view
+            audio_chunks = rng.standard_normal((5, 480), dtype=np.float32)
+            audio_chunks *= 0.1
+            for i, audio_chunk in enumerate(audio_chunks):
                 try:
-                    client.audio_output_queue.put_nowait(audio_chunk)
+                    client.audio_output_queue.sync_q.put_nowait(audio_chunk)
                     print(f"  Added chunk {i+1}: {len(audio_chunk)} samples")
                 except:
                     pass
@@ -113,6 +112,7 @@ def test_output_buffering():
     print("\n✅ Output buffering test completed")
 
 
+@buffered_output
 def test_realistic_scenario():
     """Test realistic scenario with mixed input/output"""
     print("\n=== Testing Realistic Scenario ===")
@@ -124,21 +124,63 @@ def test_realistic_scenario():
     sizes = [200, 800, 1500, 2500, 100, 1920]
 
     for i, size in enumerate(sizes):
-        audio_data = (
-            np.sin(2 * np.pi * 440 * np.arange(size) / MOSHI_SAMPLE_RATE).astype(np.float32)
-            * 0.1
-        )
+        audio_data = sine_tone(size)
         print(f"  Chunk {i+1}: {size} samples")
         client.add_audio_input(audio_data)
 
         # Check queue state
-        queue_size = client.audio_input_queue.qsize()
-        buffer_size = len(client._input_audio_buffer)
-        print(f"    Queue items: {queue_size}, Buffer samples: {buffer_size}")
+        enqueued_chunks = client._enqueued_chunks
+        buffer_size = client._input_buf_len
+        print(f"    Chunks enqueued so far: {enqueued_chunks}, Buffer samples: {buffer_size}")
 
     print("\n✅ Realistic scenario test completed")
 
 
+@buffered_output
+def test_ring_buffer():
+    """Test AudioRingBuffer wraparound, partial writes when full, and clear()"""
+    print("\n=== Testing Output Ring Buffer ===")
+
+    ring = AudioRingBuffer(1000)
+    data = np.arange(1200, dtype=np.float32)
+    out = np.empty(1000, dtype=np.float32)
+
+    print(f"Empty ring: len={len(ring)}, free_space={ring.free_space()}")
+    assert len(ring) == 0 and ring.free_space() == 1000
+
+    # Partial write when the data does not fit
+    written = ring.write(data)
+    print(f"Wrote {written}/{len(data)} samples into capacity {ring.capacity}")
+    assert written == 1000 and ring.free_space() == 0
+    assert ring.write(data) == 0  # Full: nothing is written
+    assert ring.read_into(out) == 1000
+    assert np.array_equal(out, data[:1000])
+
+    # Leave the indices mid-storage, then write across the end (wraparound):
+    # 800 written and 500 read, so 400 more start at 800 and wrap to 0
+    ring.write(data[:800])
+    ring.read_into(out[:500])
+    written = ring.write(data[800:1200])
+    print(f"Wrote {written} samples across the wrap point, len={len(ring)}")
+    assert written == 400 and len(ring) == 700 and ring.free_space() == 300
+
+    # Reading back across the wrap point returns the samples in order
+    read = ring.read_into(out)
+    print(f"Read {read} samples back across the wrap point")
+    assert read == 700
+    assert np.array_equal(out[:700], data[500:1200])
+    assert len(ring) == 0 and ring.read_into(out) == 0
+
+    # clear() discards unread samples and frees their space
+    ring.write(data[:300])
+    ring.clear()
+    print(f"After clear(): len={len(ring)}, free_space={ring.free_space()}")
+    assert len(ring) == 0 and ring.free_space() == 1000
+
+    print("  ✅ Ring buffer behaves correctly!")
+    print("\n✅ Ring buffer test completed")
+
+
 if __name__ == "__main__":
     print("Testing MoshiClient Enhanced Buffering")
     print("=" * 50)
@@ -147,6 +189,7 @@ if __name__ == "__main__":
         test_input_buffering()
         test_output_buffering()
         test_realistic_scenario()
+        test_ring_buffer()
 
         print("\n🎉 All tests completed successfully!")
 
@@ -3,81 +3,90 @@
 Test script for MoshiClient buffering functionality (offline mode)
 """
 
+import math
 import numpy as np
 import time
 import threading
 from fujielab.moshi.moshi_client_lib import MoshiClient, MOSHI_SAMPLE_RATE, MOSHI_CHUNK_SIZE
+from script_helpers import buffered_output
 
 
-def test_input_buffering_offline():
-    """Test arbitrary length input buffering without connection"""
-    print("=== Testing Input Buffering (Offline Mode) ===")
+# Input sizes checked by test_input_buffering_size, one fresh client per size
+INPUT_TEST_SIZES = [100, 500, 1000, 1920, 2000, 3000, 5000]
 
-    client = MoshiClient()
 
-    # Test data of different sizes
-    test_sizes = [100, 500, 1000, 1920, 2000, 3000, 5000]
+def pytest_generate_tests(metafunc):
+    """Run each input size as its own pytest case (so pytest -n can spread them)"""
+    if "size" in metafunc.fixturenames:
+        metafunc.parametrize("size", INPUT_TEST_SIZES)
 
-    print(f"Expected chunk size for server: {MOSHI_CHUNK_SIZE}")
 
-    for size in test_sizes:
-        # Create test audio data
-        test_audio = np.random.randn(size).astype(np.float32) * 0.1
+@buffered_output
+def test_input_buffering_size(size):
+    """Test buffering of a single input of the given length on a fresh client"""
+    client = MoshiClient()
 
-        print(f"\nTesting input size: {size}")
-        print(f"Input buffer before: {len(client._input_audio_buffer)}")
+    # Bypass connection check for testing
+    client.is_connected = lambda: True
 
-        # Temporarily bypass connection check for testing
-        original_check = client.is_connected
-        client.is_connected = lambda: True
+    # Create test audio data
+    rng = np.random.default_rng(size)
+    test_audio = rng.standard_normal(size, dtype=np.float32)
+    test_audio *= np.float32(0.1)
 
-        # Add audio input (this should buffer internally)
-        client.add_audio_input(test_audio)
+    print(f"\nTesting input size: {size}")
+    print(f"Input buffer before: {client._input_buf_len}")
+
+    # Add audio input (this should buffer internally)
+    client.add_audio_input(test_audio)
+
+    print(f"Input buffer after: {client._input_buf_len}")
+    print(f"Chunks enqueued so far: {client._enqueued_chunks}")
 
-        # Restore original check
-        client.is_connected = original_check
-
-        print(f"Input buffer after: {len(client._input_audio_buffer)}")
-        print(f"Items in audio_input_queue: {client.audio_input_queue.qsize()}")
-
-        # Check that queue only has CHUNK_SIZE items
-        total_queued = 0
-        temp_items = []
-        while not client.audio_input_queue.empty():
-            try:
-                item = client.audio_input_queue.get_nowait()
-                temp_items.append(item)
-                total_queued += len(item)
-                if len(item) == MOSHI_CHUNK_SIZE:
-                    print(f"  ✅ Queue item size: {len(item)} (correct)")
-                else:
-                    print(f"  ❌ Queue item size: {len(item)} (should be {MOSHI_CHUNK_SIZE})")
-            except:
-                break
-
-        # Put items back
-        for item in temp_items:
-            client.audio_input_queue.put_nowait(item)
-
-        print(f"Total samples in queue: {total_queued}")
-
-        # Verify buffering logic
-        expected_complete_chunks = size // MOSHI_CHUNK_SIZE
-        expected_remaining = size % MOSHI_CHUNK_SIZE
-        actual_remaining = len(client._input_audio_buffer)
-
-        print(f"Expected complete chunks: {expected_complete_chunks}")
-        print(f"Expected remaining samples: {expected_remaining}")
-        print(f"Actual remaining samples: {actual_remaining}")
-
-        if actual_remaining == expected_remaining:
-            print("  ✅ Buffering logic correct!")
+    # Check that queue only has CHUNK_SIZE items. Snapshot the queue under a
+    # single lock acquisition instead of draining and refilling it.
+    items = client.audio_input_queue.snapshot()
+    total_queued = sum(len(item) for item in items)
+    for item in items:
+        if len(item) == MOSHI_CHUNK_SIZE:
+            print(f"  ✅ Queue item size: {len(item)} (correct)")
         else:
-            print("  ❌ Buffering logic incorrect!")
+            print(f"  ❌ Queue item size: {len(item)} (should be {MOSHI_CHUNK_SIZE})")
+
+    print(f"Total samples in queue: {total_queued}")
+
+    # Verify buffering logic
+    expected_complete_chunks = size // MOSHI_CHUNK_SIZE
+    expected_remaining = size % MOSHI_CHUNK_SIZE
+    actual_remaining = client._input_buf_len
+
+    print(f"Expected complete chunks: {expected_complete_chunks}")
+    print(f"Expected remaining samples: {expected_remaining}")
+    print(f"Actual remaining samples: {actual_remaining}")
+
+    if actual_remaining == expected_remaining and len(items) == expected_complete_chunks:
+        print("  ✅ Buffering logic correct!")
+    else:
+        print("  ❌ Buffering logic incorrect!")
+
+    assert len(items) == expected_complete_chunks
+    assert all(len(item) == MOSHI_CHUNK_SIZE for item in items)
+    assert actual_remaining == expected_remaining
+
+
+@buffered_output
+def run_input_buffering_offline():
+    """Test arbitrary length input buffering without connection"""
+    print("=== Testing Input Buffering (Offline Mode) ===")
+    print(f"Expected chunk size for server: {MOSHI_CHUNK_SIZE}")
+
+    for size in INPUT_TEST_SIZES:
+        test_input_buffering_size(size)
 
     print("\n✅ Input buffering test completed")
 
 
+@buffered_output
 def test_cumulative_input():
     """Test cumulative input that spans multiple chunks"""
     print("\n=== Testing Cumulative Input ===")
@@ -91,24 +100,31 @@ def test_cumulative_input():
     chunk_sizes = [400, 300, 500, 200, 600, 800, 300]  # Total: 3100 samples
     total_added = 0
 
+    # 440 Hz repeats exactly every `period` samples, so compute one period once
+    # and index it with a running phase (a continuous tone across chunks)
+    period = MOSHI_SAMPLE_RATE // math.gcd(MOSHI_SAMPLE_RATE, 440)
+    sine_table = (
+        np.sin(2 * np.pi * 440 * np.arange(period) / MOSHI_SAMPLE_RATE).astype(np.float32)
+        * 0.1
+    )
+    phase = 0
+
     for i, size in enumerate(chunk_sizes):
-        test_audio = (
-            np.sin(2 * np.pi * 440 * np.arange(size) / MOSHI_SAMPLE_RATE).astype(np.float32)
-            * 0.1
-        )
+        test_audio = sine_table[(phase + np.arange(size)) % period]
+        phase = (phase + size) % period
 
         print(f"\nAdding chunk {i+1}: {size} samples")
         client.add_audio_input(test_audio)
         total_added += size
 
-        queue_items = client.audio_input_queue.qsize()
-        buffer_samples = len(client._input_audio_buffer)
+        enqueued_chunks = client._enqueued_chunks
+        buffer_samples = client._input_buf_len
 
         print(f"  Total added so far: {total_added}")
-        print(f"  Queue items: {queue_items}")
+        print(f"  Chunks enqueued so far: {enqueued_chunks}")
         print(f"  Buffer samples: {buffer_samples}")
         print(f"  Expected buffer: {total_added % MOSHI_CHUNK_SIZE}")
-        print(f"  Expected queue items: {total_added // MOSHI_CHUNK_SIZE}")
+        print(f"  Expected chunks enqueued: {total_added // MOSHI_CHUNK_SIZE}")
 
         if buffer_samples == total_added % MOSHI_CHUNK_SIZE:
             print("  ✅ Buffer size correct!")
@@ -119,44 +135,72 @@ def test_cumulative_input():
     print(f"Total samples added: {total_added}")
     print(f"Complete chunks expected: {total_added // MOSHI_CHUNK_SIZE}")
     print(f"Remaining samples expected: {total_added % MOSHI_CHUNK_SIZE}")
-    print(f"Queue items: {client.audio_input_queue.qsize()}")
-    print(f"Buffer samples: {len(client._input_audio_buffer)}")
+    print(f"Chunks enqueued: {client._enqueued_chunks}")
+    print(f"Buffer samples: {client._input_buf_len}")
 
     print("\n✅ Cumulative input test completed")
 
 
+@buffered_output
 def demonstrate_usage():
     """Demonstrate typical usage patterns"""
     print("\n=== Usage Demonstration ===")
 
-    # Example 1: Different output buffer sizes
+    # One client is reused for all examples; reset_buffers() clears it between them
+    client = MoshiClient()
+
+    rng = np.random.default_rng(0)
+
+    # Example 1: Different output buffer sizes. The last size needs more than the
+    # ring capacity the client was built with, so the setter grows the ring and
+    # keeps the audio already buffered in it.
     print("\n1. Different output buffer sizes:")
-    for buffer_size in [480, 960, 1920]:
-        client = MoshiClient(output_buffer_size=buffer_size)
-        print(f"   Client with {buffer_size} sample output buffer created")
+    initial_capacity = client._output_audio_buffer.capacity
+    buffered_output_audio = rng.standard_normal(1000, dtype=np.float32)
+    client._output_audio_buffer.write(buffered_output_audio)
+    for buffer_size in [480, 960, 1920, 9600]:
+        client.output_buffer_size = buffer_size
+        print(
+            f"   Client with {client.output_buffer_size} sample output buffer configured "
+            f"(ring capacity {client._output_audio_buffer.capacity})"
+        )
+    assert client._output_audio_buffer.capacity > initial_capacity
+    assert len(client._output_audio_buffer) == len(buffered_output_audio)
+    print(f"   ✅ Ring grew from {initial_capacity} samples and kept {len(client._output_audio_buffer)} buffered samples")
 
     # Example 2: Input buffering demonstration
     print("\n2. Input buffering:")
-    client = MoshiClient()
+    client.reset_buffers()
+    assert len(client._output_audio_buffer) == 0  # Leftover output from example 1 is gone
     client.is_connected = lambda: True  # Bypass connection check
 
     print("   Adding irregular sized audio chunks...")
     sizes = [300, 1200, 500, 2000]
+    scratch = np.empty(max(sizes), dtype=np.float32)
     for size in sizes:
-        audio = np.random.randn(size).astype(np.float32) * 0.1
+        audio = scratch[:size]
+        rng.standard_normal(dtype=np.float32, out=audio)
+        audio *= np.float32(0.1)
         client.add_audio_input(audio)
         print(
-            f"   Added {size} samples -> Queue: {client.audio_input_queue.qsize()} items, Buffer: {len(client._input_audio_buffer)} samples"
+            f"   Added {size} samples -> Enqueued so far: {client._enqueued_chunks} chunks, Buffer: {client._input_buf_len} samples"
         )
 
     # Example 3: Output with timeout
     print("\n3. Output with timeout:")
-    client = MoshiClient(output_buffer_size=960)
-
-    # Add some test data
-    for _ in range(3):
-        test_audio = np.random.randn(480).astype(np.float32) * 0.1
-        client.audio_output_queue.put_nowait(test_audio)
+    client.reset_buffers()
+    # Leftover input from example 2 (partial chunk and queued chunks) is gone
+    assert client._input_buf_len == 0 and client._enqueued_chunks == 0
+    assert not client.audio_input_queue.snapshot()
+    print("   ✅ reset_buffers() discarded the leftover input")
+    client.output_buffer_size = 960
+
+    # Add some test data (queued items stay alive, so they must not share a
+    # scratch buffer; the rows of one array are separate views)
+    test_chunks = rng.standard_normal((3, 480), dtype=np.float32)
+    test_chunks *= np.float32(0.1)
+    for test_audio in test_chunks:
+        client.audio_output_queue.sync_q.put_nowait(test_audio)
 
     # Test different timeout modes
     result = client.get_audio_output(timeout=0)  # Non-blocking
@@ -169,6 +213,18 @@ def demonstrate_usage():
         f"   With timeout: {'Got data' if result is not None else 'No data'} ({len(result) if result is not None else 0} samples)"
     )
 
+    # The short read left 480 samples in the ring; queue one more chunk, then
+    # check that reset_buffers() discards both
+    client.audio_output_queue.sync_q.put_nowait(test_chunks[0])
+    print(
+        f"   Before reset: {len(client._output_audio_buffer)} samples in the ring, "
+        f"{client.audio_output_queue.sync_q.qsize()} chunk(s) queued"
+    )
+    client.reset_buffers()
+    assert len(client._output_audio_buffer) == 0
+    assert client.audio_output_queue.sync_q.empty()
+    print("   ✅ reset_buffers() discarded the leftover output")
+
     print("\n✅ Usage demonstration completed")
 
 
@@ -177,7 +233,7 @@ if __name__ == "__main__":
     print("=" * 60)
 
     try:
-        test_input_buffering_offline()
+        run_input_buffering_offline()
         test_cumulative_input()
         demonstrate_usage()
 
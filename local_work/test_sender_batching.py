@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test script for MoshiClient send batching (offline mode, fake WebSocket)
+"""
+
+import asyncio
+import time
+import numpy as np
+from fujielab.moshi.moshi_client_lib import MoshiClient, MOSHI_CHUNK_SIZE
+from script_helpers import buffered_output
+
+SEND_BATCH_MS = 400  # 5 Ogg pages (80ms frames) per message
+BATCH_SEC = SEND_BATCH_MS / 1000
+TOLERANCE_SEC = 0.05
+
+
+class FakeWebSocket:
+    """Records when each message is sent and how many Ogg pages it holds"""
+
+    def __init__(self):
+        self.start_time = time.monotonic()
+        self.sent = []  # (seconds since start, pages in message)
+
+    async def send(self, message):
+        self.sent.append((time.monotonic() - self.start_time, message.count(b"OggS")))
+
+
+class FakeEncoder:
+    """Like OpusEncoder, returns one Ogg page per 1920-sample frame (without Opus)"""
+
+    def encode(self, audio_data):
+        return [b"OggS" + b"\x00" * 16] * (len(audio_data) // MOSHI_CHUNK_SIZE)
+
+
+def queue_frames(client, count):
+    """Queue one input item holding count frames, which encodes to count pages at once"""
+    client.audio_input_queue.async_q.put_nowait(np.zeros(count * MOSHI_CHUNK_SIZE, dtype=np.float32))
+
+
+async def run_sender(feed):
+    """Run the sender loop with fake components while feed() queues input, then stop it"""
+    client = MoshiClient(send_batch_ms=SEND_BATCH_MS)
+    client._websocket = FakeWebSocket()
+    client._encoder = FakeEncoder()
+    client._running.set()
+
+    sender_task = asyncio.create_task(client._sender_loop())
+    await feed(client)
+
+    # Stop the way _async_communication_main does: clear the flag and cancel
+    client._running.clear()
+    sender_task.cancel()
+    try:
+        await sender_task
+    except asyncio.CancelledError:
+        pass
+    return client._websocket.sent
+
+
+def check(sent, expected):
+    """Compare (time, pages) messages to the expected ones, timing within TOLERANCE_SEC"""
+    for (sent_time, pages), (expected_time, expected_pages) in zip(sent, expected):
+        print(f"  Sent {pages} pages at {sent_time:.2f}s (expected {expected_pages} at {expected_time:.2f}s)")
+    ok = len(sent) == len(expected) and all(
+        pages == expected_pages and abs(sent_time - expected_time) < TOLERANCE_SEC
+        for (sent_time, pages), (expected_time, expected_pages) in zip(sent, expected)
+    )
+    print("  ✅ Batching correct!" if ok else f"  ❌ Batching incorrect: {sent}")
+    assert ok
+
+
+@buffered_output
+def test_partial_batch_deadline():
+    """Test that a partial batch is sent once its oldest page has waited send_batch_ms"""
+    print("=== Testing Partial Batch Deadline ===")
+
+    async def feed(client):
+        queue_frames(client, 7)  # One full batch and 2 leftover pages
+        await asyncio.sleep(BATCH_SEC + 0.1)
+
+    check(asyncio.run(run_sender(feed)), [(0.0, 5), (BATCH_SEC, 2)])
+    print("\n✅ Partial batch deadline test completed")
+
+
+@buffered_output
+def test_deadline_restarts_after_batch():
+    """Test that pages left over after a full batch get a fresh deadline"""
+    print("\n=== Testing Deadline Restart After a Batch ===")
+
+    async def feed(client):
+        queue_frames(client, 3)
+        await asyncio.sleep(0.2)
+        queue_frames(client, 4)  # Completes a batch at 0.2s, 2 newer pages left over
+        await asyncio.sleep(BATCH_SEC + 0.1)
+
+    check(asyncio.run(run_sender(feed)), [(0.2, 5), (0.2 + BATCH_SEC, 2)])
+    print("\n✅ Deadline restart test completed")
+
+
+@buffered_output
+def test_flush_on_shutdown():
+    """Test that pages still pending when the sender stops are sent, not discarded"""
+    print("\n=== Testing Flush on Shutdown ===")
+
+    async def feed(client):
+        queue_frames(client, 2)
+        await asyncio.sleep(0.1)  # Stop well before the batch deadline
+
+    check(asyncio.run(run_sender(feed)), [(0.1, 2)])
+    print("\n✅ Flush on shutdown test completed")
+
+
+if __name__ == "__main__":
+    print("Testing MoshiClient Send Batching")
+    print("=" * 50)
+
+    try:
+        test_partial_batch_deadline()
+        test_deadline_restarts_after_batch()
+        test_flush_on_shutdown()
+
+        print("\n🎉 All tests completed successfully!")
+
+    except Exception as e:
+        print(f"\n❌ Test failed with error: {e}")
+        import traceback
+
+        traceback.print_exc()